@@ -1,13 +1,33 @@
+from __future__ import annotations
+
 import streamlit as st
-import google.generativeai as genai
-import networkx as nx
-import plotly.graph_objects as go
-import plotly.express as px
 import json
 import re
 import os
-from typing import List, Dict, Tuple
-import pandas as pd
+import tempfile
+import io
+import hashlib
+import datetime
+import time
+import random
+import textwrap
+import functools
+import inspect
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Callable, TYPE_CHECKING
+import orjson
+
+# Heavy dependencies are imported inside the functions that use them, so the
+# script starts quickly before an API key has been entered
+if TYPE_CHECKING:
+    import diskcache
+    import google.generativeai as genai
+    import networkx as nx
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
 
 # Configure page
 st.set_page_config(
@@ -17,58 +37,746 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+MODEL_NAME = 'gemini-2.5-flash-preview-04-17'
+PROMPT_CACHE_TTL = datetime.timedelta(hours=1)
+
+# Entity types allowed by the structured-output schema (see _generation_config)
+ENTITY_TYPES = ["person", "organization", "location", "concept", "event", "unknown"]
+
+# In-memory response cache shared by all sessions of this process
+RESPONSE_CACHE_TTL = 3600  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+# Semantic cache settings: reuse an extraction when a new input embeds close enough to a previous one
+EMBEDDING_MODEL = 'models/text-embedding-004'
+EMBEDDING_DIM = 768
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 500
+SEMANTIC_CACHE_TTL = 3600  # seconds since an entry was last used
+
+# Long inputs are split into overlapping chunks that are extracted concurrently
+CHUNK_SIZE = 2000
+CHUNK_OVERLAP = 200
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 5
+
+# Persistent response cache shared by all sessions and surviving restarts
+DISK_CACHE_DIR = os.path.join(tempfile.gettempdir(), "kg_cache")
+DISK_CACHE_SIZE_LIMIT = 500 * 1024 * 1024
+DISK_CACHE_TTL = 7 * 24 * 3600  # seconds
+
+# Graph layout: networkx >= 3.5 ships an L-BFGS energy layout; older releases use the vendored one below
+LAYOUT_K = 3
+LAYOUT_ITERATIONS = 50
+DENSE_LAYOUT_MAX_NODES = 500
+
+# Figure and table caches are shared by all sessions, so bound their memory
+RENDER_CACHE_MAX_ENTRIES = 32
+RENDER_CACHE_TTL = 3600  # seconds
+
+# Graphs above this many nodes are drawn with WebGL; SVG looks crisper for small graphs
+WEBGL_MIN_NODES = 200
+
+# Static extraction rubric, sent once per session as a cached system instruction.
+# Gemini only caches prompts above a minimum token count, so the schema and
+# worked example are spelled out in full.
+EXTRACTION_INSTRUCTIONS = """
+You are an information extraction system that turns unstructured text into a knowledge graph.
+Analyze the text you are given and extract entities and relationships. Return the result as a valid JSON object with the following structure:
+
+{
+    "entities": [
+        {"name": "entity_name", "type": "entity_type", "description": "brief_description"}
+    ],
+    "relationships": [
+        {"source": "entity1", "target": "entity2", "relationship": "relationship_type", "description": "relationship_description"}
+    ]
+}
+
+Guidelines:
+- Extract people, organizations, locations, concepts, events, and other significant entities
+- Identify meaningful relationships between entities (works_for, located_in, part_of, leads_to, causes, etc.)
+- Use clear, consistent entity names
+- Provide brief but informative descriptions
+- Focus on the most important entities and relationships
+- Ensure all entities mentioned in relationships are also listed in the entities array
+
+Entity fields:
+- "name": the most complete, commonly used name of the entity as it appears in the text.
+  Use the same spelling every time the entity is referenced; do not emit "Apple" and "Apple Inc."
+  as two entities when they refer to the same organization.
+- "type": one of "person", "organization", "location", "concept", "event", or "unknown".
+  * person: a named individual, real or fictional (e.g. "Marie Curie", "Sherlock Holmes").
+  * organization: companies, institutions, agencies, teams, governments, political parties,
+    universities and other named groups of people (e.g. "NASA", "University of Oxford").
+  * location: countries, cities, regions, buildings, landmarks, bodies of water and other
+    geographical or physical places (e.g. "Cupertino", "Mount Everest", "Pacific Ocean").
+  * concept: ideas, theories, technologies, products, fields of study, laws, methods and other
+    abstract or non-physical things (e.g. "General Relativity", "iPhone", "Machine Learning").
+  * event: things that happen at a point or span in time, such as wars, elections, launches,
+    discoveries, meetings and disasters (e.g. "World War II", "Apollo 11 Moon Landing").
+  * unknown: only when none of the types above reasonably applies.
+- "description": one short sentence (at most about 20 words) describing the entity using
+  information from the text. Do not invent facts that the text does not support.
+
+Relationship fields:
+- "source": the exact "name" of an entity in the entities array.
+- "target": the exact "name" of a different entity in the entities array.
+- "relationship": a short snake_case verb phrase describing how source relates to target.
+  Prefer these labels when they fit: works_for, founded, leads, member_of, part_of, located_in,
+  headquartered_in, born_in, died_in, created, invented, owns, acquired, produces, uses,
+  influenced, causes, leads_to, precedes, follows, participated_in, occurred_in, related_to.
+  Direction matters: "Steve Jobs" founded "Apple Inc.", not the other way around.
+- "description": one short sentence explaining the relationship, including dates or
+  quantities from the text when available.
+
+Quality rules:
+- Prefer fewer, well-supported entities over many trivial ones; skip pronouns, generic nouns
+  (e.g. "the company", "people") and dates or numbers on their own.
+- Merge mentions that clearly refer to the same thing into a single entity.
+- Every relationship must connect two different entities that both appear in the entities array.
+- Do not repeat the same relationship between the same pair of entities.
+- If the text contains no meaningful entities, return {"entities": [], "relationships": []}.
+- Output must be strictly valid JSON: double-quoted keys and strings, no trailing commas,
+  no comments, no Markdown code fences and no text before or after the object.
+
+Example input:
+Apple Inc. is a technology company founded by Steve Jobs, Steve Wozniak, and Ronald Wayne in 1976.
+The company is headquartered in Cupertino, California. Tim Cook became CEO after Steve Jobs passed away in 2011.
+Apple is known for products like the iPhone, iPad, and Mac computers.
+
+Example output:
+{
+    "entities": [
+        {"name": "Apple Inc.", "type": "organization", "description": "Technology company founded in 1976 and known for the iPhone, iPad and Mac."},
+        {"name": "Steve Jobs", "type": "person", "description": "Co-founder of Apple Inc. who led the company until his death in 2011."},
+        {"name": "Steve Wozniak", "type": "person", "description": "Co-founder of Apple Inc."},
+        {"name": "Ronald Wayne", "type": "person", "description": "Co-founder of Apple Inc."},
+        {"name": "Tim Cook", "type": "person", "description": "Became CEO of Apple Inc. after Steve Jobs died in 2011."},
+        {"name": "Cupertino", "type": "location", "description": "City in California where Apple Inc. is headquartered."},
+        {"name": "California", "type": "location", "description": "US state containing Cupertino."},
+        {"name": "iPhone", "type": "concept", "description": "Smartphone product made by Apple Inc."},
+        {"name": "iPad", "type": "concept", "description": "Tablet product made by Apple Inc."},
+        {"name": "Mac", "type": "concept", "description": "Line of personal computers made by Apple Inc."}
+    ],
+    "relationships": [
+        {"source": "Steve Jobs", "target": "Apple Inc.", "relationship": "founded", "description": "Co-founded the company in 1976."},
+        {"source": "Steve Wozniak", "target": "Apple Inc.", "relationship": "founded", "description": "Co-founded the company in 1976."},
+        {"source": "Ronald Wayne", "target": "Apple Inc.", "relationship": "founded", "description": "Co-founded the company in 1976."},
+        {"source": "Tim Cook", "target": "Apple Inc.", "relationship": "leads", "description": "Became CEO in 2011."},
+        {"source": "Apple Inc.", "target": "Cupertino", "relationship": "headquartered_in", "description": "The company is headquartered in Cupertino."},
+        {"source": "Cupertino", "target": "California", "relationship": "located_in", "description": "Cupertino is a city in California."},
+        {"source": "Apple Inc.", "target": "iPhone", "relationship": "produces", "description": "Apple makes the iPhone."},
+        {"source": "Apple Inc.", "target": "iPad", "relationship": "produces", "description": "Apple makes the iPad."},
+        {"source": "Apple Inc.", "target": "Mac", "relationship": "produces", "description": "Apple makes Mac computers."}
+    ]
+}
+"""
+
+def request_key(model_name: str, text: str) -> str:
+    """Build a deterministic cache key for an extraction request."""
+    payload = json.dumps({"model": model_name, "text": text}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+@st.cache_resource
+def _response_cache() -> Dict:
+    """Create the process-wide response cache: an LRU of (stored_at, orjson bytes) entries."""
+    return {"lock": threading.Lock(), "entries": OrderedDict()}
+
+def _response_cache_get(key: str) -> Optional[Dict]:
+    """Return a fresh cached extraction for key, or None on a miss."""
+    cache = _response_cache()
+    with cache["lock"]:
+        entry = cache["entries"].get(key)
+        if entry is None:
+            return None
+        stored_at, payload = entry
+        if time.time() - stored_at > RESPONSE_CACHE_TTL:
+            del cache["entries"][key]
+            return None
+        cache["entries"].move_to_end(key)
+    return orjson.loads(payload)
+
+def _response_cache_set(key: str, extracted_data: Dict) -> None:
+    """Store an extraction, evicting the least recently used entries beyond the size limit."""
+    cache = _response_cache()
+    payload = orjson.dumps(extracted_data)
+    with cache["lock"]:
+        cache["entries"][key] = (time.time(), payload)
+        cache["entries"].move_to_end(key)
+        while len(cache["entries"]) > RESPONSE_CACHE_MAX_ENTRIES:
+            cache["entries"].popitem(last=False)
+
+@functools.lru_cache(maxsize=None)
+def _generation_config() -> Dict:
+    """Build the structured-output generation config shared by every model instance.
+    
+    Gemini decodes straight into the schema, so responses are always valid JSON.
+    """
+    import google.generativeai as genai
+    
+    schema = genai.protos.Schema(
+        type=genai.protos.Type.OBJECT,
+        properties={
+            "entities": genai.protos.Schema(
+                type=genai.protos.Type.ARRAY,
+                items=genai.protos.Schema(
+                    type=genai.protos.Type.OBJECT,
+                    properties={
+                        "name": genai.protos.Schema(type=genai.protos.Type.STRING),
+                        "type": genai.protos.Schema(type=genai.protos.Type.STRING, format="enum", enum=ENTITY_TYPES),
+                        "description": genai.protos.Schema(type=genai.protos.Type.STRING)
+                    },
+                    required=["name", "type", "description"]
+                )
+            ),
+            "relationships": genai.protos.Schema(
+                type=genai.protos.Type.ARRAY,
+                items=genai.protos.Schema(
+                    type=genai.protos.Type.OBJECT,
+                    properties={
+                        "source": genai.protos.Schema(type=genai.protos.Type.STRING),
+                        "target": genai.protos.Schema(type=genai.protos.Type.STRING),
+                        "relationship": genai.protos.Schema(type=genai.protos.Type.STRING),
+                        "description": genai.protos.Schema(type=genai.protos.Type.STRING)
+                    },
+                    required=["source", "target", "relationship", "description"]
+                )
+            )
+        },
+        required=["entities", "relationships"]
+    )
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+        # Deterministic output, so repeated inputs are safe to serve from cache
+        "temperature": 0
+    }
+
+def _retry_on_rate_limit(func):
+    """Retry a sync or async Gemini call with exponential backoff and jitter when the API returns 429."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            from google.api_core.exceptions import ResourceExhausted
+            
+            delay = 1.0
+            for attempt in range(MAX_RETRIES):
+                try:
+                    return await func(*args, **kwargs)
+                except ResourceExhausted:
+                    if attempt == MAX_RETRIES - 1:
+                        raise
+                    await asyncio.sleep(delay + random.uniform(0, delay))
+                    delay *= 2
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        from google.api_core.exceptions import ResourceExhausted
+        
+        delay = 1.0
+        for attempt in range(MAX_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except ResourceExhausted:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(delay + random.uniform(0, delay))
+                delay *= 2
+    return wrapper
+
+def _chunk_text(chunk) -> str:
+    """Text of one streamed response chunk; chunks carrying only finish_reason or usage yield ''."""
+    if not chunk.candidates:
+        return ""
+    return "".join(part.text for part in chunk.candidates[0].content.parts if "text" in part)
+
+def _parse_response(response_text: str) -> Dict:
+    """Parse a structured-output response, keeping only the plain extraction so cache entries stay small."""
+    data = orjson.loads(response_text)
+    return {
+        "entities": data.get("entities", []),
+        "relationships": data.get("relationships", [])
+    }
+
+# Only common separators are normalized; other symbols carry meaning ("C++" vs "C", "C#")
+_CANON_DROP_RE = re.compile(r'[.\'"]')
+_CANON_SPACE_RE = re.compile(r'[\s,\-]+')
+
+def _canon(name: str) -> str:
+    """Canonicalize an entity name: drop periods and quotes, treat commas and hyphens as spaces, lowercase."""
+    return _CANON_SPACE_RE.sub(" ", _CANON_DROP_RE.sub("", name)).strip().lower()
+
+def _split_text(text: str) -> List[str]:
+    """Split text into chunks of about CHUNK_SIZE characters, each overlapping the previous one."""
+    if len(text) <= CHUNK_SIZE:
+        return [text]
+    
+    pieces = textwrap.wrap(text, CHUNK_SIZE - CHUNK_OVERLAP, break_long_words=False)
+    chunks = pieces[:1]
+    for previous, piece in zip(pieces, pieces[1:]):
+        chunks.append(previous[-CHUNK_OVERLAP:] + " " + piece)
+    return chunks
+
+def _merge_extractions(results: List[Dict]) -> Dict:
+    """Merge per-chunk extractions, deduplicating entities by name and relationships by endpoints and type."""
+    entities = {}
+    relationships = {}
+    
+    for result in results:
+        for entity in result.get("entities", []):
+            name = entity.get("name")
+            if not name:
+                continue
+            # Keep the most descriptive version of each entity
+            key = name.lower()
+            if key not in entities or len(entity.get("description", "")) > len(entities[key].get("description", "")):
+                entities[key] = entity
+        
+        for rel in result.get("relationships", []):
+            key = (
+                rel.get("source", "").lower(),
+                rel.get("target", "").lower(),
+                rel.get("relationship", "").lower()
+            )
+            relationships.setdefault(key, rel)
+    
+    return {"entities": list(entities.values()), "relationships": list(relationships.values())}
+
+def _lbfgs_layout(G: nx.Graph, nodes: List, k: float, iterations: int) -> np.ndarray:
+    """Energy-based Fruchterman-Reingold layout minimized with L-BFGS, for networkx < 3.5.
+    
+    Edges pull their endpoints together with energy k * d^2 (a sparse Laplacian
+    product), every pair of nodes pushes apart with energy -k^2 * log(d), and a weak
+    pull towards the origin keeps disconnected components on screen. Repulsion is
+    computed densely, so this is only used for small graphs.
+    """
+    import networkx as nx
+    import numpy as np
+    from scipy.optimize import minimize
+    
+    n = len(nodes)
+    if n == 1:
+        return np.zeros((1, 2))
+    
+    L = nx.laplacian_matrix(G, nodelist=nodes, weight=None).astype(np.float64)
+    gravity = k / n
+    
+    def energy_and_grad(x):
+        p = x.reshape(n, 2)
+        Lp = L @ p
+        diff = p[:, None, :] - p[None, :, :]
+        dist2 = np.einsum("ijk,ijk->ij", diff, diff)
+        np.fill_diagonal(dist2, 1.0)
+        dist2 += 1e-9
+        
+        energy = k * np.sum(p * Lp) - 0.25 * k * k * np.log(dist2).sum() + gravity * np.sum(p * p)
+        grad = 2 * k * Lp - k * k * np.einsum("ijk,ij->ik", diff, 1.0 / dist2) + 2 * gravity * p
+        return energy, grad.ravel()
+    
+    x0 = np.random.default_rng().random((n, 2)).ravel()
+    result = minimize(energy_and_grad, x0, jac=True, method="L-BFGS-B", options={"maxiter": iterations})
+    return nx.rescale_layout(result.x.reshape(n, 2))
+
+@functools.lru_cache(maxsize=None)
+def _spring_layout_has_energy() -> bool:
+    """Whether the installed networkx supports spring_layout(method="energy")."""
+    import networkx as nx
+    
+    return "method" in inspect.signature(nx.spring_layout).parameters
+
+def _layout_coords(G: nx.Graph, nodes: List) -> np.ndarray:
+    """Compute node positions as an (N, 2) array in the order of nodes."""
+    import networkx as nx
+    import numpy as np
+    
+    if len(nodes) >= DENSE_LAYOUT_MAX_NODES:
+        # Large graphs: the L-BFGS energy layout where networkx ships it, otherwise
+        # its sparse Fruchterman-Reingold; the vendored layout is dense, O(N^2) memory
+        method = {"method": "energy"} if _spring_layout_has_energy() else {}
+        pos = nx.spring_layout(G, k=LAYOUT_K, iterations=LAYOUT_ITERATIONS, **method)
+    elif _spring_layout_has_energy():
+        # networkx's default method="auto" already picks the fastest path for small graphs
+        pos = nx.spring_layout(G, k=LAYOUT_K, iterations=LAYOUT_ITERATIONS)
+    else:
+        return _lbfgs_layout(G, nodes, k=LAYOUT_K, iterations=LAYOUT_ITERATIONS)
+    
+    return np.fromiter(
+        (c for node in nodes for c in pos[node]),
+        dtype=np.float64,
+        count=2 * len(nodes)
+    ).reshape(-1, 2)
+
+def _read_upload(uploaded_file) -> str:
+    """Decode an uploaded file as UTF-8, replacing undecodable bytes."""
+    wrapper = io.TextIOWrapper(uploaded_file, encoding="utf-8", errors="replace")
+    try:
+        return wrapper.read()
+    finally:
+        # Detach so the wrapper doesn't close Streamlit's upload buffer when collected
+        wrapper.detach()
+
+@st.cache_resource
+def _disk_cache() -> diskcache.Cache:
+    """Open the on-disk response cache once per process."""
+    import diskcache
+    
+    return diskcache.Cache(DISK_CACHE_DIR, size_limit=DISK_CACHE_SIZE_LIMIT)
+
+def _semantic_cache() -> Dict:
+    """Return this session's semantic cache, creating it on first use."""
+    import numpy as np
+    
+    if "sem_cache" not in st.session_state:
+        st.session_state["sem_cache"] = {
+            "embeddings": np.empty((0, EMBEDDING_DIM)),
+            "norms": np.empty(0),
+            "last_used": np.empty(0),
+            "entries": []
+        }
+    return st.session_state["sem_cache"]
+
+def _semantic_lookup(embedding: np.ndarray) -> Optional[Dict]:
+    """Return the extraction of the most similar cached input, if it is similar enough."""
+    import numpy as np
+    
+    cache = _semantic_cache()
+    if not cache["entries"]:
+        return None
+    
+    now = time.time()
+    sims = cache["embeddings"] @ embedding / (cache["norms"] * np.linalg.norm(embedding))
+    sims[now - cache["last_used"] > SEMANTIC_CACHE_TTL] = -1.0
+    
+    best = int(np.argmax(sims))
+    if sims[best] <= SEMANTIC_CACHE_THRESHOLD:
+        return None
+    
+    cache["last_used"][best] = now
+    return cache["entries"][best]
+
+def _semantic_store(embedding: np.ndarray, extracted_data: Dict) -> None:
+    """Add an extraction to the semantic cache, evicting expired and least recently used entries."""
+    import numpy as np
+    
+    cache = _semantic_cache()
+    now = time.time()
+    
+    keep = np.flatnonzero(now - cache["last_used"] <= SEMANTIC_CACHE_TTL)
+    if len(keep) >= SEMANTIC_CACHE_SIZE:
+        keep = keep[np.argsort(cache["last_used"][keep])[len(keep) - SEMANTIC_CACHE_SIZE + 1:]]
+    
+    cache["embeddings"] = np.vstack([cache["embeddings"][keep], embedding])
+    cache["norms"] = np.append(cache["norms"][keep], np.linalg.norm(embedding))
+    cache["last_used"] = np.append(cache["last_used"][keep], now)
+    cache["entries"] = [cache["entries"][i] for i in keep] + [extracted_data]
+
+@st.cache_data(show_spinner=False, max_entries=RENDER_CACHE_MAX_ENTRIES, ttl=RENDER_CACHE_TTL)
+def build_viz(nodes_json: str, edges_json: str) -> go.Figure:
+    """Create an interactive Plotly visualization of a canonicalized graph.
+    
+    Cached on the JSON node and edge lists, so Streamlit reruns reuse the
+    layout and figure until the graph itself changes.
+    """
+    import networkx as nx
+    import numpy as np
+    import plotly.graph_objects as go
+    
+    G = nx.Graph()
+    for name, entity_type, description in orjson.loads(nodes_json):
+        G.add_node(name, type=entity_type, description=description)
+    G.add_edges_from(orjson.loads(edges_json))
+    
+    if len(G.nodes()) == 0:
+        return go.Figure()
+    
+    # Node coordinates in G.nodes() order, transposed into contiguous float32
+    # x and y rows; float32 is what WebGL traces consume without an extra copy
+    nodes = list(G.nodes())
+    coords = np.ascontiguousarray(_layout_coords(G, nodes).T, dtype=np.float32)
+    node_x, node_y = coords[0], coords[1]
+    
+    # Color mapping for different entity types
+    color_map = {
+        "person": "#FF6B6B",
+        "organization": "#4ECDC4", 
+        "location": "#45B7D1",
+        "concept": "#96CEB4",
+        "event": "#FFEAA7",
+        "unknown": "#DDA0DD"
+    }
+    
+    node_types = [G.nodes[node]["type"] for node in nodes]
+    node_text = nodes
+    node_info = [
+        f"<b>{node}</b><br>Type: {entity_type}<br>Description: {G.nodes[node].get('description', '')}"
+        for node, entity_type in zip(nodes, node_types)
+    ]
+    
+    # Types are lowercased in create_graph; look up each distinct type once, then fan colors out by index
+    unique_types, type_idx = np.unique(np.array(node_types, dtype=str), return_inverse=True)
+    palette = np.array([color_map.get(t, color_map["unknown"]) for t in unique_types])
+    node_colors = palette[type_idx]
+    
+    # Edge endpoints as row/column indices into coords; the adjacency of an
+    # undirected graph is symmetric, so keep the upper triangle only
+    A = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=None, format="coo")
+    upper = A.row <= A.col
+    src_idx, dst_idx = A.row[upper], A.col[upper]
+    
+    # Edge segments as [x0, x1, NaN] triples; NaN breaks the line between edges
+    edge_x = np.empty(3 * len(src_idx), dtype=np.float32)
+    edge_y = np.empty(3 * len(src_idx), dtype=np.float32)
+    edge_x[0::3] = node_x[src_idx]
+    edge_x[1::3] = node_x[dst_idx]
+    edge_x[2::3] = np.nan
+    edge_y[0::3] = node_y[src_idx]
+    edge_y[1::3] = node_y[dst_idx]
+    edge_y[2::3] = np.nan
+    
+    # Create the figure
+    fig = go.Figure()
+    Trace = go.Scattergl if len(G) > WEBGL_MIN_NODES else go.Scatter
+    
+    # Add edges
+    fig.add_trace(Trace(
+        x=edge_x, y=edge_y,
+        line=dict(width=2, color='#888'),
+        hoverinfo='none',
+        mode='lines',
+        showlegend=False
+    ))
+    
+    # Add nodes
+    fig.add_trace(Trace(
+        x=node_x, y=node_y,
+        mode='markers+text',
+        hoverinfo='text',
+        hovertext=node_info,
+        text=node_text,
+        textposition="middle center",
+        textfont=dict(size=10, color="white"),
+        marker=dict(
+            size=30,
+            color=node_colors,
+            line=dict(width=2, color='white')
+        ),
+        showlegend=False
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title="Knowledge Graph Visualization",
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=20,l=5,r=5,t=40),
+        annotations=[ dict(
+            text="Hover over nodes and edges to see details",
+            showarrow=False,
+            xref="paper", yref="paper",
+            x=0.005, y=-0.002,
+            xanchor='left', yanchor='bottom',
+            font=dict(color='gray', size=12)
+        )],
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        plot_bgcolor='white',
+        height=600
+    )
+    
+    return fig
+
 class KnowledgeGraphGenerator:
     def __init__(self, api_key: str):
         """Initialize the knowledge graph generator with Gemini API."""
+        import google.generativeai as genai
+        
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+        self.api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        self._model = None
+    
+    @property
+    def model(self) -> genai.GenerativeModel:
+        """Lazily build the Gemini model on top of the cached extraction instructions."""
+        if self._model is None:
+            self._model = self._create_model()
+        return self._model
+    
+    def _create_model(self) -> genai.GenerativeModel:
+        """Create a model backed by a context cache, reusing this session's cache when possible."""
+        import google.generativeai as genai
+        
+        # Session state holds this key's CachedContent, or False once creating one
+        # has failed so later extractions skip straight to the uncached model
+        cache_state_key = f"prompt_cache_{self.api_key_hash}"
+        cache = st.session_state.get(cache_state_key)
+        
+        expired = cache not in (None, False) and (
+            cache.expire_time <= datetime.datetime.now(datetime.timezone.utc)
+        )
+        if cache is None or expired:
+            try:
+                cache = genai.caching.CachedContent.create(
+                    model=f"models/{MODEL_NAME}",
+                    system_instruction=EXTRACTION_INSTRUCTIONS,
+                    ttl=PROMPT_CACHE_TTL
+                )
+            except Exception:
+                # Context caching is unavailable (e.g. free-tier keys or model support)
+                cache = False
+            st.session_state[cache_state_key] = cache
+        
+        if cache is False:
+            # Send the instructions with every request instead
+            return genai.GenerativeModel(
+                MODEL_NAME,
+                system_instruction=EXTRACTION_INSTRUCTIONS,
+                generation_config=_generation_config()
+            )
+        
+        return genai.GenerativeModel.from_cached_content(cache, generation_config=_generation_config())
         
     def create_extraction_prompt(self, text: str) -> str:
-        """Create a prompt for entity and relationship extraction."""
-        prompt = f"""
-        Analyze the following text and extract entities and relationships. Return the result as a valid JSON object with the following structure:
-        
-        {{
-            "entities": [
-                {{"name": "entity_name", "type": "entity_type", "description": "brief_description"}}
-            ],
-            "relationships": [
-                {{"source": "entity1", "target": "entity2", "relationship": "relationship_type", "description": "relationship_description"}}
-            ]
-        }}
-        
-        Guidelines:
-        - Extract people, organizations, locations, concepts, events, and other significant entities
-        - Identify meaningful relationships between entities (works_for, located_in, part_of, leads_to, causes, etc.)
-        - Use clear, consistent entity names
-        - Provide brief but informative descriptions
-        - Focus on the most important entities and relationships
-        - Ensure all entities mentioned in relationships are also listed in the entities array
-        
-        Text to analyze:
-        {text}
-        
-        Return only the JSON object, no additional text.
+        """Create the per-request prompt; the extraction rubric lives in the cached system instruction."""
+        return f"Text to analyze:\n{text}\nReturn only the JSON object."
+    
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text for the semantic cache; returns None if embedding fails."""
+        import google.generativeai as genai
+        import numpy as np
+        
+        try:
+            result = genai.embed_content(model=EMBEDDING_MODEL, content=text, task_type="semantic_similarity")
+            return np.asarray(result["embedding"], dtype=np.float64)
+        except Exception:
+            return None
+    
+    @_retry_on_rate_limit
+    def _extract_chunk(self, chunk: str, on_progress: Optional[Callable[[str], None]] = None) -> Dict:
+        """Stream Gemini's response for a single chunk of text and parse the JSON."""
+        prompt = self.create_extraction_prompt(chunk)
+        parts = []
+        for response in self.model.generate_content(prompt, stream=True):
+            piece = _chunk_text(response)
+            if not piece:
+                continue
+            parts.append(piece)
+            if on_progress is not None:
+                on_progress(piece)
+        return _parse_response("".join(parts))
+    
+    @_retry_on_rate_limit
+    async def _aextract(self, text: str, on_progress: Optional[Callable[[str], None]] = None) -> Dict:
+        """Asynchronously stream Gemini's response for a single text and parse the JSON."""
+        prompt = self.create_extraction_prompt(text)
+        parts = []
+        async for response in await self.model.generate_content_async(prompt, stream=True):
+            piece = _chunk_text(response)
+            if not piece:
+                continue
+            parts.append(piece)
+            if on_progress is not None:
+                on_progress(piece)
+        return _parse_response("".join(parts))
+    
+    async def _gather(self, texts: List[str], on_progress: Optional[Callable[[str], None]] = None) -> List:
+        """Run extractions for all texts on one event loop, with bounded concurrency.
+        
+        Returns one result per text, or the exception its extraction raised.
         """
-        return prompt
+        sem = asyncio.Semaphore(MAX_CONCURRENCY)
+        
+        async def one(text: str) -> Dict:
+            async with sem:
+                return await self._aextract(text, on_progress)
+        
+        return await asyncio.gather(*(one(text) for text in texts), return_exceptions=True)
     
-    def extract_entities_relationships(self, text: str) -> Dict:
-        """Extract entities and relationships using Gemini."""
+    def extract_many(self, texts: List[str], on_progress: Optional[Callable[[str], None]] = None) -> List[Dict]:
+        """Extract entities and relationships from several texts concurrently.
+        
+        on_progress, if given, is called with each piece of streamed response text.
+        Texts whose extraction fails are skipped with a warning, so one failed chunk
+        doesn't discard the others; if every text fails, the first error is raised.
+        """
+        results = asyncio.run(self._gather(texts, on_progress))
+        extracted = [r for r in results if not isinstance(r, BaseException)]
+        failed = len(results) - len(extracted)
+        if failed == len(results) and results:
+            raise next(r for r in results if isinstance(r, BaseException))
+        if failed:
+            st.warning(f"{failed} of {len(results)} chunks could not be extracted; the graph is built from the rest. Submit again to retry them.")
+        return extracted
+    
+    def _extract_uncached(self, text: str, on_progress: Optional[Callable[[str], None]] = None) -> Tuple[Dict, bool]:
+        """Extract from text, reusing a persisted result or that of a semantically equivalent earlier input.
+        
+        Returns the result and whether it is complete; partial results (some chunks
+        failed) are not cached, so the failed chunks are retried next time.
+        """
+        key = request_key(MODEL_NAME, text)
         try:
-            prompt = self.create_extraction_prompt(text)
-            response = self.model.generate_content(prompt)
-            
-            # Clean the response to extract JSON
-            response_text = response.text.strip()
+            persisted = _disk_cache().get(key)
+        except Exception:
+            # The disk cache is only a cache (locked, full or read-only); treat as a miss
+            persisted = None
+        if persisted is not None:
+            st.session_state["disk_hits"] = st.session_state.get("disk_hits", 0) + 1
+            return orjson.loads(persisted), True
+        
+        # Only inputs of at most one chunk's length go through the semantic cache: the
+        # embedding model truncates long documents, so two documents sharing their
+        # opening pages would otherwise match each other. Gate on length, not chunk
+        # count, since text without spaces always comes back as a single chunk
+        chunks = _split_text(text)
+        embedding = self._embed(text) if len(text) <= CHUNK_SIZE else None
+        if embedding is not None:
+            cached = _semantic_lookup(embedding)
+            if cached is not None:
+                st.session_state["semantic_hits"] = st.session_state.get("semantic_hits", 0) + 1
+                return cached, True
+        
+        if len(chunks) == 1:
+            result = self._extract_chunk(text, on_progress)
+        else:
+            extractions = self.extract_many(chunks, on_progress)
+            result = _merge_extractions(extractions)
+            if len(extractions) < len(chunks):
+                return result, False
+        
+        try:
+            _disk_cache().set(key, orjson.dumps(result), expire=DISK_CACHE_TTL)
+        except Exception:
+            # Never lose a paid-for result because it couldn't be persisted
+            pass
+        if embedding is not None:
+            _semantic_store(embedding, result)
+        return result, True
+    
+    def extract_entities_relationships(self, text: str, on_progress: Optional[Callable[[str], None]] = None) -> Dict:
+        """Extract entities and relationships using Gemini, reusing cached results for repeated text.
+        
+        on_progress, if given, is called with each piece of response text as it streams in.
+        Sets st.session_state["extraction_complete"] to False when some chunks failed.
+        """
+        st.session_state["extraction_complete"] = True
+        try:
+            # Look the result up first and only stream from Gemini on a miss; the
+            # progress callback draws Streamlit elements, so it must never run
+            # inside an st.cache_data function whose output would be replayed
+            key = f"{self.api_key_hash}:{request_key(MODEL_NAME, text)}"
+            result = _response_cache_get(key)
+            if result is not None:
+                st.session_state["cache_hits"] = st.session_state.get("cache_hits", 0) + 1
+                return result
             
-            # Try to find JSON in the response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
-            else:
-                # If no JSON found, try to parse the entire response
-                return json.loads(response_text)
+            st.session_state["cache_misses"] = st.session_state.get("cache_misses", 0) + 1
+            result, complete = self._extract_uncached(text, on_progress)
+            if complete:
+                _response_cache_set(key, result)
+            st.session_state["extraction_complete"] = complete
+            return result
                 
         except json.JSONDecodeError as e:
             st.error(f"Error parsing AI response: {e}")
@@ -79,22 +787,44 @@ class KnowledgeGraphGenerator:
     
     def create_graph(self, extracted_data: Dict) -> nx.Graph:
         """Create a NetworkX graph from extracted entities and relationships."""
+        import networkx as nx
+        
         G = nx.Graph()
         
-        # Add nodes (entities)
+        # Merge entities whose names differ only in case, punctuation or spacing,
+        # keeping the longest spelling and description
+        merged = {}
         for entity in extracted_data.get("entities", []):
-            G.add_node(
-                entity["name"],
-                type=entity.get("type", "unknown"),
-                description=entity.get("description", "")
-            )
+            name = " ".join(entity["name"].split())
+            entity_type = entity.get("type", "unknown").lower()
+            description = entity.get("description", "")
+            key = _canon(name) or name
+            
+            node = merged.get(key)
+            if node is None:
+                merged[key] = {"name": name, "type": entity_type, "description": description}
+                continue
+            if len(name) > len(node["name"]):
+                node["name"] = name
+            if node["type"] == "unknown":
+                node["type"] = entity_type
+            if len(description) > len(node["description"]):
+                node["description"] = description
+        
+        # Add nodes (entities)
+        for node in merged.values():
+            G.add_node(node["name"], type=node["type"], description=node["description"])
         
-        # Add edges (relationships)
+        # Add edges (relationships) between known entities only, using their merged names
         for rel in extracted_data.get("relationships", []):
-            source = rel.get("source", "")
-            target = rel.get("target", "")
+            try:
+                source = merged[_canon(rel["source"]) or rel["source"]]["name"]
+                target = merged[_canon(rel["target"]) or rel["target"]]["name"]
+            except KeyError:
+                continue
             
-            if source and target and G.has_node(source) and G.has_node(target):
+            # Skip self-loops, including ones created by merging two spellings
+            if source != target:
                 G.add_edge(
                     source,
                     target,
@@ -106,108 +836,161 @@ class KnowledgeGraphGenerator:
     
     def create_plotly_visualization(self, G: nx.Graph) -> go.Figure:
         """Create an interactive Plotly visualization of the graph."""
-        if len(G.nodes()) == 0:
-            return go.Figure()
-        
-        # Use spring layout for node positioning
-        pos = nx.spring_layout(G, k=3, iterations=50)
-        
-        # Extract node information
-        node_x = []
-        node_y = []
-        node_text = []
-        node_info = []
-        node_colors = []
-        
-        # Color mapping for different entity types
-        color_map = {
-            "person": "#FF6B6B",
-            "organization": "#4ECDC4", 
-            "location": "#45B7D1",
-            "concept": "#96CEB4",
-            "event": "#FFEAA7",
-            "unknown": "#DDA0DD"
+        nodes_json = orjson.dumps(sorted(
+            (node, data["type"], data["description"]) for node, data in G.nodes(data=True)
+        )).decode()
+        edges_json = orjson.dumps(sorted(tuple(sorted(edge)) for edge in G.edges())).decode()
+        return build_viz(nodes_json, edges_json)
+
+@st.cache_data(show_spinner=False, max_entries=RENDER_CACHE_MAX_ENTRIES, ttl=RENDER_CACHE_TTL)
+def _tables(extracted_data_json: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series]:
+    """Build the entity and relationship tables and entity type counts for an extraction."""
+    import pandas as pd
+    
+    extracted_data = orjson.loads(extracted_data_json)
+    entities_df = pd.DataFrame(extracted_data.get("entities", []))
+    relationships_df = pd.DataFrame(extracted_data.get("relationships", []))
+    
+    entity_types = entities_df.get("type", pd.Series("unknown", index=entities_df.index, dtype=object))
+    type_counts = entity_types.fillna("unknown").value_counts()
+    
+    return entities_df, relationships_df, type_counts
+
+def render_results(kg_generator: KnowledgeGraphGenerator, extracted_data: Dict, G: nx.Graph) -> None:
+    """Render the success message and the graph, data and statistics tabs."""
+    # Display results
+    st.success(f"✅ Successfully extracted {len(extracted_data.get('entities', []))} entities and {len(extracted_data.get('relationships', []))} relationships!")
+    
+    entities_df, relationships_df, type_counts = _tables(orjson.dumps(extracted_data).decode())
+    
+    # Create tabs for different views
+    tab1, tab2, tab3 = st.tabs(["📊 Graph Visualization", "📋 Extracted Data", "📈 Graph Statistics"])
+    
+    with tab1:
+        import pandas as pd
+        
+        st.subheader("Knowledge Graph")
+        fig = kg_generator.create_plotly_visualization(G)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Legend
+        st.subheader("Entity Type Legend")
+        legend_data = {
+            "Entity Type": ["Person", "Organization", "Location", "Concept", "Event", "Unknown"],
+            "Color": ["🔴", "🟢", "🔵", "🟤", "🟡", "🟣"]
         }
+        st.table(pd.DataFrame(legend_data))
+    
+    with tab2:
+        col1, col2 = st.columns(2)
         
-        for node in G.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            
-            node_data = G.nodes[node]
-            entity_type = node_data.get("type", "unknown")
-            description = node_data.get("description", "")
-            
-            node_text.append(node)
-            node_info.append(f"<b>{node}</b><br>Type: {entity_type}<br>Description: {description}")
-            node_colors.append(color_map.get(entity_type.lower(), color_map["unknown"]))
-        
-        # Extract edge information
-        edge_x = []
-        edge_y = []
-        edge_info = []
-        
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-            
-            edge_data = G.edges[edge]
-            relationship = edge_data.get("relationship", "related_to")
-            description = edge_data.get("description", "")
-            edge_info.append(f"{edge[0]} → {relationship} → {edge[1]}<br>{description}")
-        
-        # Create the figure
-        fig = go.Figure()
-        
-        # Add edges
-        fig.add_trace(go.Scatter(
-            x=edge_x, y=edge_y,
-            line=dict(width=2, color='#888'),
-            hoverinfo='none',
-            mode='lines',
-            showlegend=False
-        ))
-        
-        # Add nodes
-        fig.add_trace(go.Scatter(
-            x=node_x, y=node_y,
-            mode='markers+text',
-            hoverinfo='text',
-            hovertext=node_info,
-            text=node_text,
-            textposition="middle center",
-            textfont=dict(size=10, color="white"),
-            marker=dict(
-                size=30,
-                color=node_colors,
-                line=dict(width=2, color='white')
-            ),
-            showlegend=False
-        ))
-        
-        # Update layout
-        fig.update_layout(
-            title="Knowledge Graph Visualization",
-            showlegend=False,
-            hovermode='closest',
-            margin=dict(b=20,l=5,r=5,t=40),
-            annotations=[ dict(
-                text="Hover over nodes and edges to see details",
-                showarrow=False,
-                xref="paper", yref="paper",
-                x=0.005, y=-0.002,
-                xanchor='left', yanchor='bottom',
-                font=dict(color='gray', size=12)
-            )],
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            plot_bgcolor='white',
-            height=600
-        )
+        with col1:
+            st.subheader("Entities")
+            if not entities_df.empty:
+                st.dataframe(entities_df, use_container_width=True)
+            else:
+                st.info("No entities extracted.")
+        
+        with col2:
+            st.subheader("Relationships")
+            if not relationships_df.empty:
+                st.dataframe(relationships_df, use_container_width=True)
+            else:
+                st.info("No relationships extracted.")
+    
+    with tab3:
+        import networkx as nx
+        import plotly.express as px
+        
+        st.subheader("Graph Statistics")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total Nodes", len(G.nodes()))
+        
+        with col2:
+            st.metric("Total Edges", len(G.edges()))
+        
+        with col3:
+            st.metric("Graph Density", f"{nx.density(G):.3f}")
         
-        return fig
+        with col4:
+            if len(G.nodes()) > 0:
+                avg_degree = sum(dict(G.degree()).values()) / len(G.nodes())
+                st.metric("Avg Degree", f"{avg_degree:.2f}")
+            else:
+                st.metric("Avg Degree", "0")
+        
+        # Entity type distribution
+        if not type_counts.empty:
+            st.subheader("Entity Type Distribution")
+            fig_pie = px.pie(
+                values=type_counts.values,
+                names=type_counts.index,
+                title="Distribution of Entity Types"
+            )
+            st.plotly_chart(fig_pie, use_container_width=True)
+
+def handle_submit(kg_generator: KnowledgeGraphGenerator, text_input: str, uploaded_files: List) -> None:
+    """Run extraction for a submitted form and store successful results in session state."""
+    if uploaded_files:
+        if len(uploaded_files) == 1:
+            text_input = _read_upload(uploaded_files[0])
+        else:
+            text_input = "\n\n".join(_read_upload(uploaded_file) for uploaded_file in uploaded_files)
+        
+        preview = text_input[:500]
+        if len(text_input) > 500:
+            preview += "..."
+        st.text_area("Uploaded text preview:", value=preview, height=150, disabled=True)
+    
+    if not text_input.strip():
+        st.error("Please provide some text to analyze.")
+        return
+    
+    # Skip extraction when the input matches the results already in session state
+    input_key = request_key(MODEL_NAME, text_input)
+    if st.session_state.get("extracted_key") != input_key:
+        # Live feedback while the response streams in
+        progress = st.empty()
+        received = {"chars": 0, "entities": 0}
+        
+        def on_progress(delta: str) -> None:
+            received["chars"] += len(delta)
+            received["entities"] += delta.count('"name"')
+            progress.caption(
+                f"…received {received['chars']:,} characters, "
+                f"about {received['entities']} entities so far"
+            )
+        
+        with st.spinner("Analyzing text with Gemini AI..."):
+            # Extract entities and relationships
+            extracted_data = kg_generator.extract_entities_relationships(text_input, on_progress)
+        progress.empty()
+        
+        if not extracted_data.get("entities") and not extracted_data.get("relationships"):
+            _clear_results()
+            st.error("No entities or relationships could be extracted from the text.")
+            return
+        
+        # Create graph
+        G = kg_generator.create_graph(extracted_data)
+        
+        if len(G.nodes()) == 0:
+            _clear_results()
+            st.error("No valid graph could be created from the extracted data.")
+            return
+        
+        # Partial results are shown but not remembered, so submitting again retries the failed chunks
+        st.session_state["extracted_key"] = input_key if st.session_state.get("extraction_complete", True) else None
+        st.session_state["extracted_data"] = extracted_data
+        st.session_state["graph"] = G
+
+def _clear_results() -> None:
+    """Drop the previous extraction so stale results aren't shown after a failed run."""
+    for key in ("extracted_key", "extracted_data", "graph"):
+        st.session_state.pop(key, None)
 
 def main():
     st.title("🧠 AI-Powered Knowledge Graph Generator")
@@ -240,123 +1023,47 @@ def main():
     # Main interface
     st.header("Input Text")
     
-    # Input method selection
+    # Input method selection; kept outside the form so switching swaps the input widget
     input_method = st.radio(
         "Choose input method:",
         ["Type text directly", "Upload text file"]
     )
     
-    text_input = ""
-    
-    if input_method == "Type text directly":
-        text_input = st.text_area(
-            "Enter your text:",
-            height=200,
-            placeholder="Paste or type the text you want to analyze..."
-        )
-    else:
-        uploaded_file = st.file_uploader(
-            "Upload a text file:",
-            type=['txt'],
-            help="Upload a .txt file containing the text to analyze"
-        )
-        
-        if uploaded_file is not None:
-            text_input = str(uploaded_file.read(), "utf-8")
-            st.text_area("Uploaded text preview:", value=text_input[:500] + "..." if len(text_input) > 500 else text_input, height=150, disabled=True)
-    
-    # Generate button
-    if st.button("🚀 Generate Knowledge Graph", type="primary"):
-        if not text_input.strip():
-            st.error("Please provide some text to analyze.")
-            return
+    # Widget edits inside the form don't rerun the script until it is submitted
+    with st.form("kg_form"):
+        text_input = ""
+        uploaded_files = []
         
-        with st.spinner("Analyzing text with Gemini AI..."):
-            # Extract entities and relationships
-            extracted_data = kg_generator.extract_entities_relationships(text_input)
-            
-            if not extracted_data.get("entities") and not extracted_data.get("relationships"):
-                st.error("No entities or relationships could be extracted from the text.")
-                return
-            
-            # Create graph
-            G = kg_generator.create_graph(extracted_data)
-            
-            if len(G.nodes()) == 0:
-                st.error("No valid graph could be created from the extracted data.")
-                return
-        
-        # Display results
-        st.success(f"✅ Successfully extracted {len(extracted_data.get('entities', []))} entities and {len(extracted_data.get('relationships', []))} relationships!")
-        
-        # Create tabs for different views
-        tab1, tab2, tab3 = st.tabs(["📊 Graph Visualization", "📋 Extracted Data", "📈 Graph Statistics"])
+        if input_method == "Type text directly":
+            text_input = st.text_area(
+                "Enter your text:",
+                height=200,
+                placeholder="Paste or type the text you want to analyze..."
+            )
+        else:
+            uploaded_files = st.file_uploader(
+                "Upload text files:",
+                type=['txt'],
+                accept_multiple_files=True,
+                help="Upload one or more .txt files containing the text to analyze"
+            )
         
-        with tab1:
-            st.subheader("Knowledge Graph")
-            fig = kg_generator.create_plotly_visualization(G)
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Legend
-            st.subheader("Entity Type Legend")
-            legend_data = {
-                "Entity Type": ["Person", "Organization", "Location", "Concept", "Event", "Unknown"],
-                "Color": ["🔴", "🟢", "🔵", "🟤", "🟡", "🟣"]
-            }
-            st.table(pd.DataFrame(legend_data))
-        
-        with tab2:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("Entities")
-                entities_df = pd.DataFrame(extracted_data.get("entities", []))
-                if not entities_df.empty:
-                    st.dataframe(entities_df, use_container_width=True)
-                else:
-                    st.info("No entities extracted.")
-            
-            with col2:
-                st.subheader("Relationships")
-                relationships_df = pd.DataFrame(extracted_data.get("relationships", []))
-                if not relationships_df.empty:
-                    st.dataframe(relationships_df, use_container_width=True)
-                else:
-                    st.info("No relationships extracted.")
-        
-        with tab3:
-            st.subheader("Graph Statistics")
-            
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Nodes", len(G.nodes()))
-            
-            with col2:
-                st.metric("Total Edges", len(G.edges()))
-            
-            with col3:
-                st.metric("Graph Density", f"{nx.density(G):.3f}")
-            
-            with col4:
-                if len(G.nodes()) > 0:
-                    avg_degree = sum(dict(G.degree()).values()) / len(G.nodes())
-                    st.metric("Avg Degree", f"{avg_degree:.2f}")
-                else:
-                    st.metric("Avg Degree", "0")
-            
-            # Entity type distribution
-            if extracted_data.get("entities"):
-                entity_types = [entity.get("type", "unknown") for entity in extracted_data["entities"]]
-                type_counts = pd.Series(entity_types).value_counts()
-                
-                st.subheader("Entity Type Distribution")
-                fig_pie = px.pie(
-                    values=type_counts.values,
-                    names=type_counts.index,
-                    title="Distribution of Entity Types"
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
+        submitted = st.form_submit_button("🚀 Generate Knowledge Graph", type="primary")
+    
+    if submitted:
+        handle_submit(kg_generator, text_input, uploaded_files)
+    
+    # Response cache statistics, drawn after any extraction so the counts are current
+    st.sidebar.caption(
+        f"Response cache: {st.session_state.get('cache_hits', 0)} hits, "
+        f"{st.session_state.get('cache_misses', 0)} misses, "
+        f"{st.session_state.get('disk_hits', 0)} disk hits, "
+        f"{st.session_state.get('semantic_hits', 0)} semantic hits"
+    )
+    
+    # Results persist in session state, so reruns render them without re-running extraction
+    if "graph" in st.session_state:
+        render_results(kg_generator, st.session_state["extracted_data"], st.session_state["graph"])
     
     # Footer
     st.markdown("---")